@@ -59,6 +59,24 @@ static int type_alloc(void)
     return idx;
 }
 
+/* Bare identifiers (u64, string, worker-id, ...) repeat throughout a
+ * schema, so they are interned: every occurrence of a name shares one
+ * TYPE_IDENT node.  Pool entries are immutable once parsed, which makes
+ * the sharing safe, and the pool no longer fills up with duplicates. */
+static int type_intern_ident(const char *name)
+{
+    for (int i = 0; i < g_type_pool_count; i++) {
+        if (g_type_pool[i].kind == TYPE_IDENT &&
+            strcmp(g_type_pool[i].ident, name) == 0)
+            return i;
+    }
+    int idx = type_alloc();
+    if (idx < 0) return -1;
+    g_type_pool[idx].kind = TYPE_IDENT;
+    strncpy(g_type_pool[idx].ident, name, MAX_NAME - 1);
+    return idx;
+}
+
 /* Stringify a type expression (for diagnostics and debug). Returns bytes written. */
 static int type_to_str(int idx, char *buf, int bufsize)
 {
@@ -171,28 +189,85 @@ static void build_result_access_paths(const char *access,
     *err_access_out = err_access;
 }
 
+/* ------------------------------------------------------------------ */
+/* Name conversion helpers                                            */
+/* ------------------------------------------------------------------ */
+
+/* kebab-case → snake_case: "message-envelope" → "message_envelope" */
+static void kebab_to_snake(const char *in, char *out, int n)
+{
+    int i = 0;
+    while (*in && i < n - 1) {
+        out[i++] = (*in == '-') ? '_' : *in;
+        in++;
+    }
+    out[i] = '\0';
+}
+
+/* kebab-case → UPPER_SNAKE: "message-kind" → "MESSAGE_KIND" */
+static void kebab_to_upper(const char *in, char *out, int n)
+{
+    int i = 0;
+    while (*in && i < n - 1) {
+        char ch = (*in == '-') ? '_' : *in;
+        out[i++] = (char)toupper((unsigned char)ch);
+        in++;
+    }
+    out[i] = '\0';
+}
+
+/* kebab-case → CamelCase: "message-envelope" → "MessageEnvelope" */
+static void kebab_to_camel(const char *in, char *out, int n)
+{
+    int i = 0;
+    int cap = 1;
+    while (*in && i < n - 1) {
+        if (*in == '-') {
+            cap = 1;
+        } else {
+            out[i++] = cap ? (char)toupper((unsigned char)*in) : *in;
+            cap = 0;
+        }
+        in++;
+    }
+    out[i] = '\0';
+}
+
 /* ------------------------------------------------------------------ */
 /* AST types                                                          */
 /* ------------------------------------------------------------------ */
 
+/*
+ * Records, fields, variants and cases also carry their C spellings
+ * (snake_case, CamelCase, UPPER_SNAKE), derived once at parse time
+ * because every emitter pass needs them.
+ */
 typedef struct {
     char name[MAX_NAME];
+    char snake[MAX_NAME];
     int  wit_type; /* index into g_type_pool */
 } WitField;
 
 typedef struct {
     char     name[MAX_NAME];
+    char     snake[MAX_NAME];
+    char     camel[MAX_NAME];
     WitField fields[MAX_FIELDS];
     int      field_count;
 } WitRecord;
 
 typedef struct {
     char name[MAX_NAME];
+    char snake[MAX_NAME];
+    char upper[MAX_NAME];
     int  payload_type; /* index into g_type_pool, or -1 */
 } WitVariantCase;
 
 typedef struct {
     char           name[MAX_NAME];
+    char           snake[MAX_NAME];
+    char           camel[MAX_NAME];
+    char           upper[MAX_NAME];
     WitVariantCase cases[MAX_CASES];
     int            case_count;
 } WitVariant;
@@ -283,20 +358,30 @@ static void skip_whitespace(Scanner *s)
     }
 }
 
+static int is_ident_char(char ch)
+{
+    return isalnum((unsigned char)ch) || ch == '-' || ch == '_';
+}
+
+/* Identifier and keyword runs never contain '\n', so they are measured
+ * first and consumed in one step rather than through per-character
+ * scanner_advance() line/column bookkeeping. */
+static void scanner_skip_run(Scanner *s, int n)
+{
+    s->pos += n;
+    s->col += n;
+}
+
 static int scan_ident(Scanner *s, char *buf, int bufsize)
 {
     skip_whitespace(s);
-    int i = 0;
-    while (!scanner_eof(s) && i < bufsize - 1) {
-        char ch = scanner_peek(s);
-        if (isalnum((unsigned char)ch) || ch == '-' || ch == '_') {
-            buf[i++] = scanner_advance(s);
-        } else {
-            break;
-        }
-    }
-    buf[i] = '\0';
-    return i;
+    int n = 0;
+    while (s->pos + n < s->len && n < bufsize - 1 && is_ident_char(s->src[s->pos + n]))
+        n++;
+    memcpy(buf, s->src + s->pos, (size_t)n);
+    buf[n] = '\0';
+    scanner_skip_run(s, n);
+    return n;
 }
 
 static int expect_char(Scanner *s, char expected)
@@ -306,27 +391,54 @@ static int expect_char(Scanner *s, char expected)
         scanner_advance(s);
         return 1;
     }
+    if (scanner_eof(s)) {
+        fprintf(stderr, "wit_codegen: line %d col %d: expected '%c', got end of input\n",
+                s->line, s->col, expected);
+        return 0;
+    }
     fprintf(stderr, "wit_codegen: line %d col %d: expected '%c', got '%c'\n",
             s->line, s->col, expected, scanner_peek(s));
     return 0;
 }
 
-static int match_keyword(Scanner *s, const char *kw)
+/* Keywords are always string literals, so their length is a compile-time
+ * constant; match_keyword() passes it through instead of calling strlen()
+ * on every attempt in parse_wit's keyword chain. */
+static int match_keyword_n(Scanner *s, const char *kw, int kwlen)
 {
     skip_whitespace(s);
-    int kwlen = (int)strlen(kw);
     if (s->pos + kwlen > s->len) return 0;
     if (memcmp(s->src + s->pos, kw, kwlen) != 0) return 0;
-    if (s->pos + kwlen < s->len) {
-        char next = s->src[s->pos + kwlen];
-        if (isalnum((unsigned char)next) || next == '-' || next == '_')
-            return 0;
-    }
-    for (int i = 0; i < kwlen; i++)
-        scanner_advance(s);
+    if (s->pos + kwlen < s->len && is_ident_char(s->src[s->pos + kwlen]))
+        return 0;
+    scanner_skip_run(s, kwlen);
     return 1;
 }
 
+/* The "" kw "" concatenation only compiles for a string literal, so passing
+ * a pointer (whose sizeof is not the keyword length) is a build error. */
+#define match_keyword(s, kw) \
+    match_keyword_n((s), "" kw "", (int)(sizeof("" kw "") - 1))
+
+/* After a member of a { ... } body the only legal continuations are ','
+ * or the closing '}' (trailing comma optional).  Anything else is an
+ * error rather than something to resynchronise past. */
+static int expect_member_end(Scanner *s)
+{
+    skip_whitespace(s);
+    char ch = scanner_peek(s);
+    if (ch == ',') { scanner_advance(s); return 1; }
+    if (ch == '}') return 1;
+    if (scanner_eof(s)) {
+        fprintf(stderr, "wit_codegen: line %d col %d: expected ',' or '}', got end of input\n",
+                s->line, s->col);
+        return 0;
+    }
+    fprintf(stderr, "wit_codegen: line %d col %d: expected ',' or '}', got '%c'\n",
+            s->line, s->col, ch);
+    return 0;
+}
+
 /* ------------------------------------------------------------------ */
 /* Recursive descent parser                                           */
 /* ------------------------------------------------------------------ */
@@ -346,11 +458,7 @@ static int parse_type_expr(Scanner *s)
     skip_whitespace(s);
     if (scanner_peek(s) != '<') {
         /* bare identifier */
-        int idx = type_alloc();
-        if (idx < 0) return -1;
-        g_type_pool[idx].kind = TYPE_IDENT;
-        strncpy(g_type_pool[idx].ident, name, MAX_NAME - 1);
-        return idx;
+        return type_intern_ident(name);
     }
 
     /* generic type: name<params...> */
@@ -392,6 +500,8 @@ static int parse_type_expr(Scanner *s)
 static int parse_record(Scanner *s, WitRecord *rec)
 {
     if (!scan_ident(s, rec->name, MAX_NAME)) return 0;
+    kebab_to_snake(rec->name, rec->snake, MAX_NAME);
+    kebab_to_camel(rec->name, rec->camel, MAX_NAME);
     if (!expect_char(s, '{')) return 0;
     rec->field_count = 0;
     while (rec->field_count < MAX_FIELDS) {
@@ -399,10 +509,11 @@ static int parse_record(Scanner *s, WitRecord *rec)
         if (scanner_peek(s) == '}') { scanner_advance(s); return 1; }
         WitField *f = &rec->fields[rec->field_count];
         if (!scan_ident(s, f->name, MAX_NAME)) return 0;
+        kebab_to_snake(f->name, f->snake, MAX_NAME);
         if (!expect_char(s, ':')) return 0;
         f->wit_type = parse_type_expr(s);
         if (f->wit_type < 0) return 0;
-        expect_char(s, ',');
+        if (!expect_member_end(s)) return 0;
         rec->field_count++;
     }
     return expect_char(s, '}');
@@ -411,6 +522,9 @@ static int parse_record(Scanner *s, WitRecord *rec)
 static int parse_variant(Scanner *s, WitVariant *var)
 {
     if (!scan_ident(s, var->name, MAX_NAME)) return 0;
+    kebab_to_snake(var->name, var->snake, MAX_NAME);
+    kebab_to_camel(var->name, var->camel, MAX_NAME);
+    kebab_to_upper(var->name, var->upper, MAX_NAME);
     if (!expect_char(s, '{')) return 0;
     var->case_count = 0;
     while (var->case_count < MAX_CASES) {
@@ -418,6 +532,8 @@ static int parse_variant(Scanner *s, WitVariant *var)
         if (scanner_peek(s) == '}') { scanner_advance(s); return 1; }
         WitVariantCase *c = &var->cases[var->case_count];
         if (!scan_ident(s, c->name, MAX_NAME)) return 0;
+        kebab_to_snake(c->name, c->snake, MAX_NAME);
+        kebab_to_upper(c->name, c->upper, MAX_NAME);
         c->payload_type = -1;
         skip_whitespace(s);
         if (scanner_peek(s) == '(') {
@@ -426,7 +542,7 @@ static int parse_variant(Scanner *s, WitVariant *var)
             if (c->payload_type < 0) return 0;
             if (!expect_char(s, ')')) return 0;
         }
-        expect_char(s, ',');
+        if (!expect_member_end(s)) return 0;
         var->case_count++;
     }
     return expect_char(s, '}');
@@ -441,7 +557,7 @@ static int parse_enum(Scanner *s, WitEnum *en)
         skip_whitespace(s);
         if (scanner_peek(s) == '}') { scanner_advance(s); return 1; }
         if (!scan_ident(s, en->cases[en->case_count], MAX_NAME)) return 0;
-        expect_char(s, ',');
+        if (!expect_member_end(s)) return 0;
         en->case_count++;
     }
     return expect_char(s, '}');
@@ -456,7 +572,7 @@ static int parse_flags(Scanner *s, WitFlags *fl)
         skip_whitespace(s);
         if (scanner_peek(s) == '}') { scanner_advance(s); return 1; }
         if (!scan_ident(s, fl->bits[fl->bit_count], MAX_NAME)) return 0;
-        expect_char(s, ',');
+        if (!expect_member_end(s)) return 0;
         fl->bit_count++;
     }
     return expect_char(s, '}');
@@ -516,8 +632,13 @@ static int parse_wit(Scanner *s, WitRegistry *reg)
             }
             if (!parse_alias(s, &reg->aliases[reg->alias_count])) return 0;
             reg->alias_count++;
-        } else if (scanner_peek(s) == '}') {
-            scanner_advance(s);
+        } else if (is_ident_char(scanner_peek(s))) {
+            /* Skip unrecognised words whole so keywords only match at
+             * the start of a token, never inside one ("my-record"). */
+            int n = 0;
+            while (s->pos + n < s->len && is_ident_char(s->src[s->pos + n]))
+                n++;
+            scanner_skip_run(s, n);
         } else {
             scanner_advance(s);
         }
@@ -584,16 +705,45 @@ static int resolve_type(const WitRegistry *reg, int type_idx)
     return type_idx;
 }
 
+/* WIT primitives and their C/Thatch mapping.  Numeric primitives carry a
+ * fixed-width C type plus the tag and payload size used by the writer and
+ * reader emitters; bool maps to uint8_t but is encoded as a bare tag, and
+ * char/string have no fixed-width C type. */
+typedef struct {
+    const char *name;
+    const char *ctype;
+    const char *tag;
+    int         size;
+} WitPrim;
+
+static const WitPrim k_prims[] = {
+    {"s8",     "int8_t",   "SAP_WIT_TAG_S8",  1},
+    {"u8",     "uint8_t",  "SAP_WIT_TAG_U8",  1},
+    {"s16",    "int16_t",  "SAP_WIT_TAG_S16", 2},
+    {"u16",    "uint16_t", "SAP_WIT_TAG_U16", 2},
+    {"s32",    "int32_t",  "SAP_WIT_TAG_S32", 4},
+    {"u32",    "uint32_t", "SAP_WIT_TAG_U32", 4},
+    {"s64",    "int64_t",  "SAP_WIT_TAG_S64", 8},
+    {"u64",    "uint64_t", "SAP_WIT_TAG_U64", 8},
+    {"f32",    "float",    "SAP_WIT_TAG_F32", 4},
+    {"f64",    "double",   "SAP_WIT_TAG_F64", 8},
+    {"bool",   "uint8_t",  NULL,              0},
+    {"char",   NULL,       NULL,              0},
+    {"string", NULL,       NULL,              0},
+};
+
+static const WitPrim *find_prim(const char *name)
+{
+    for (size_t i = 0; i < sizeof(k_prims) / sizeof(k_prims[0]); i++)
+        if (strcmp(name, k_prims[i].name) == 0)
+            return &k_prims[i];
+    return NULL;
+}
+
 /* Check if a type expression is a WIT primitive. */
 static int is_primitive(const char *name)
 {
-    static const char *prims[] = {
-        "s8","u8","s16","u16","s32","u32","s64","u64",
-        "f32","f64","bool","char","string", NULL
-    };
-    for (const char **p = prims; *p; p++)
-        if (strcmp(name, *p) == 0) return 1;
-    return 0;
+    return find_prim(name) != NULL;
 }
 
 /* Check if a resolved type has fixed Thatch size (no skip pointer needed).
@@ -650,69 +800,34 @@ static int is_list_u8(const WitRegistry *reg, const WitTypeExpr *t)
     return et->kind == TYPE_IDENT && strcmp(et->ident, "u8") == 0;
 }
 
-/* ------------------------------------------------------------------ */
-/* Name conversion helpers                                            */
-/* ------------------------------------------------------------------ */
-
-/* kebab-case → snake_case: "message-envelope" → "message_envelope" */
-static void kebab_to_snake(const char *in, char *out, int n)
-{
-    int i = 0;
-    while (*in && i < n - 1) {
-        out[i++] = (*in == '-') ? '_' : *in;
-        in++;
-    }
-    out[i] = '\0';
-}
-
-/* kebab-case → UPPER_SNAKE: "message-kind" → "MESSAGE_KIND" */
-static void kebab_to_upper(const char *in, char *out, int n)
-{
-    int i = 0;
-    while (*in && i < n - 1) {
-        char ch = (*in == '-') ? '_' : *in;
-        out[i++] = (char)toupper((unsigned char)ch);
-        in++;
-    }
-    out[i] = '\0';
-}
-
-/* kebab-case → CamelCase: "message-envelope" → "MessageEnvelope" */
-static void kebab_to_camel(const char *in, char *out, int n)
-{
-    int i = 0;
-    int cap = 1;
-    while (*in && i < n - 1) {
-        if (*in == '-') {
-            cap = 1;
-        } else {
-            out[i++] = cap ? (char)toupper((unsigned char)*in) : *in;
-            cap = 0;
-        }
-        in++;
-    }
-    out[i] = '\0';
-}
-
 /* ------------------------------------------------------------------ */
 /* DBI entry extraction                                               */
 /* ------------------------------------------------------------------ */
 
+/* key/val point at the registry's records rather than copying their
+ * names; the record nodes already carry snake/camel spellings. */
 typedef struct {
     int  dbi;
     char name[MAX_NAME];
-    char key_rec[MAX_NAME];
-    char val_rec[MAX_NAME];
+    char snake[MAX_NAME];       /* derived once by extract_dbis() */
+    char upper[MAX_NAME];
+    const WitRecord *key;
+    const WitRecord *val;
 } DbiEntry;
 
+/* Stands in for a missing key or value record: every name is "". */
+static const WitRecord k_no_record;
+
 static int extract_dbis(const WitRegistry *reg, DbiEntry *out, int max)
 {
     int count = 0;
     for (int i = 0; i < reg->record_count; i++) {
+        /* Cheap name checks first: most records are not dbiN-*-key/value. */
         const char *rn = reg->records[i].name;
         if (strncmp(rn, "dbi", 3) != 0) continue;
 
         const char *p = rn + 3;
+        int has_number = *p >= '0' && *p <= '9';
         int dbi = 0;
         while (*p >= '0' && *p <= '9') { dbi = dbi * 10 + (*p - '0'); p++; }
         if (*p != '-') continue;
@@ -727,27 +842,39 @@ static int extract_dbis(const WitRegistry *reg, DbiEntry *out, int max)
             is_key = 0; name_len = len - 6;
         } else continue;
 
-        int slot = -1;
-        for (int j = 0; j < count; j++)
-            if (out[j].dbi == dbi) { slot = j; break; }
-        if (slot < 0) {
+        /* dbi-<name>-key/value without an index is a typo, not DBI 0. */
+        if (!has_number) {
+            fprintf(stderr, "wit_codegen: record '%s' is missing its DBI number "
+                    "(expected dbi<N>-<name>-key/value)\n", rn);
+            return -1;
+        }
+
+        /* Keep out[] sorted by DBI number as we go.  Schemas declare DBIs
+         * in order, so the backwards scan normally stops immediately. */
+        int pos = count;
+        while (pos > 0 && out[pos - 1].dbi > dbi) pos--;
+        int slot;
+        if (pos > 0 && out[pos - 1].dbi == dbi) {
+            slot = pos - 1;
+        } else {
             if (count >= max) return -1;
-            slot = count++;
+            memmove(&out[pos + 1], &out[pos],
+                    (size_t)(count - pos) * sizeof(*out));
+            count++;
+            slot = pos;
             out[slot].dbi = dbi;
             memcpy(out[slot].name, p, name_len);
             out[slot].name[name_len] = '\0';
-            out[slot].key_rec[0] = '\0';
-            out[slot].val_rec[0] = '\0';
+            out[slot].key = &k_no_record;
+            out[slot].val = &k_no_record;
         }
-        if (is_key) strncpy(out[slot].key_rec, rn, MAX_NAME - 1);
-        else        strncpy(out[slot].val_rec, rn, MAX_NAME - 1);
-    }
-    /* Sort by DBI number */
-    for (int i = 0; i < count - 1; i++)
-        for (int j = i + 1; j < count; j++)
-            if (out[i].dbi > out[j].dbi) {
-                DbiEntry tmp = out[i]; out[i] = out[j]; out[j] = tmp;
-            }
+        if (is_key) out[slot].key = &reg->records[i];
+        else        out[slot].val = &reg->records[i];
+    }
+    for (int i = 0; i < count; i++) {
+        kebab_to_snake(out[i].name, out[i].snake, MAX_NAME);
+        kebab_to_upper(out[i].name, out[i].upper, MAX_NAME);
+    }
     return count;
 }
 
@@ -784,7 +911,13 @@ static void collect_struct_deps(const WitRegistry *reg, int type_idx,
     }
 }
 
-static int topo_sort_types(const WitRegistry *reg, const char **order, int max_order)
+/* A struct-emitting type in emission order: exactly one of rec/var is set. */
+typedef struct {
+    const WitRecord  *rec;
+    const WitVariant *var;
+} StructRef;
+
+static int topo_sort_types(const WitRegistry *reg, StructRef *order, int max_order)
 {
     const char *names[MAX_TYPES * 2];
     const char *dep_buf[MAX_TYPES * 2][MAX_TYPES];
@@ -809,15 +942,25 @@ static int topo_sort_types(const WitRegistry *reg, const char **order, int max_o
         n++;
     }
 
-    /* Kahn's algorithm */
+    /* Resolve dependency names to node indices once, so Kahn's loop
+     * compares ints instead of re-running strcmp over every edge per round. */
+    int dep_idx[MAX_TYPES * 2][MAX_TYPES];
     int in_deg[MAX_TYPES * 2];
     for (int i = 0; i < n; i++) {
         in_deg[i] = 0;
-        for (int d = 0; d < dep_cnt[i]; d++)
+        for (int d = 0; d < dep_cnt[i]; d++) {
+            dep_idx[i][d] = -1;
             for (int j = 0; j < n; j++)
-                if (strcmp(names[j], dep_buf[i][d]) == 0) { in_deg[i]++; break; }
+                if (strcmp(names[j], dep_buf[i][d]) == 0) {
+                    dep_idx[i][d] = j;
+                    in_deg[i]++;
+                    break;
+                }
+        }
     }
 
+    /* Kahn's algorithm */
+
     int done[MAX_TYPES * 2] = {0};
     int count = 0;
     while (count < n) {
@@ -829,12 +972,16 @@ static int topo_sort_types(const WitRegistry *reg, const char **order, int max_o
             return -1;
         }
         done[found] = 1;
-        if (count < max_order) order[count] = names[found];
+        if (count < max_order) {
+            order[count].rec = found < reg->record_count ? &reg->records[found] : NULL;
+            order[count].var = found < reg->record_count
+                               ? NULL : &reg->variants[found - reg->record_count];
+        }
         count++;
         for (int i = 0; i < n; i++) {
             if (done[i]) continue;
             for (int d = 0; d < dep_cnt[i]; d++)
-                if (strcmp(dep_buf[i][d], names[found]) == 0) { in_deg[i]--; break; }
+                if (dep_idx[i][d] == found) { in_deg[i]--; break; }
         }
     }
     return count;
@@ -846,18 +993,8 @@ static int topo_sort_types(const WitRegistry *reg, const char **order, int max_o
 
 static const char *prim_c_type(const char *name)
 {
-    if (strcmp(name, "s8")   == 0) return "int8_t";
-    if (strcmp(name, "u8")   == 0) return "uint8_t";
-    if (strcmp(name, "s16")  == 0) return "int16_t";
-    if (strcmp(name, "u16")  == 0) return "uint16_t";
-    if (strcmp(name, "s32")  == 0) return "int32_t";
-    if (strcmp(name, "u32")  == 0) return "uint32_t";
-    if (strcmp(name, "s64")  == 0) return "int64_t";
-    if (strcmp(name, "u64")  == 0) return "uint64_t";
-    if (strcmp(name, "f32")  == 0) return "float";
-    if (strcmp(name, "f64")  == 0) return "double";
-    if (strcmp(name, "bool") == 0) return "uint8_t";
-    return NULL;
+    const WitPrim *prim = find_prim(name);
+    return prim ? prim->ctype : NULL;
 }
 
 /* ------------------------------------------------------------------ */
@@ -1007,10 +1144,11 @@ static void emit_variant_payload(FILE *out, const WitRegistry *reg,
 /* ------------------------------------------------------------------ */
 
 static void emit_header(FILE *out, const WitRegistry *reg,
+                        const StructRef *order, int norder,
                         const DbiEntry *dbis, int ndbi,
                         const char *header_path)
 {
-    char upper[MAX_NAME], camel[MAX_NAME], snake[MAX_NAME];
+    char upper[MAX_NAME];
 
     /* Derive include guard from header filename (basename, uppercased). */
     char guard[MAX_NAME];
@@ -1094,8 +1232,7 @@ static void emit_header(FILE *out, const WitRegistry *reg,
 
     /* --- DBI index constants --- */
     for (int i = 0; i < ndbi; i++) {
-        kebab_to_upper(dbis[i].name, upper, MAX_NAME);
-        fprintf(out, "#define SAP_WIT_DBI_%s %du\n", upper, dbis[i].dbi);
+        fprintf(out, "#define SAP_WIT_DBI_%s %du\n", dbis[i].upper, dbis[i].dbi);
     }
     fprintf(out, "\n");
 
@@ -1136,37 +1273,23 @@ static void emit_header(FILE *out, const WitRegistry *reg,
     /* --- Variant case tag constants --- */
     for (int i = 0; i < reg->variant_count; i++) {
         const WitVariant *var = &reg->variants[i];
-        kebab_to_upper(var->name, upper, MAX_NAME);
-        for (int j = 0; j < var->case_count; j++) {
-            char cu[MAX_NAME];
-            kebab_to_upper(var->cases[j].name, cu, MAX_NAME);
-            fprintf(out, "#define SAP_WIT_%s_%s %d\n", upper, cu, j);
-        }
+        for (int j = 0; j < var->case_count; j++)
+            fprintf(out, "#define SAP_WIT_%s_%s %d\n", var->upper, var->cases[j].upper, j);
         fprintf(out, "\n");
     }
 
     /* --- Struct typedefs in topological order --- */
-    const char *order[MAX_TYPES * 2];
-    int norder = topo_sort_types(reg, order, MAX_TYPES * 2);
-    if (norder < 0) return;
-
     for (int idx = 0; idx < norder; idx++) {
-        const char *tname = order[idx];
-        const WitRecord *rec = find_record(reg, tname);
+        const WitRecord *rec = order[idx].rec;
         if (rec) {
-            kebab_to_camel(tname, camel, MAX_NAME);
             fprintf(out, "typedef struct {\n");
-            for (int j = 0; j < rec->field_count; j++) {
-                char fname[MAX_NAME];
-                kebab_to_snake(rec->fields[j].name, fname, MAX_NAME);
-                emit_c_fields(out, reg, rec->fields[j].wit_type, fname, "    ");
-            }
-            fprintf(out, "} SapWit%s;\n\n", camel);
+            for (int j = 0; j < rec->field_count; j++)
+                emit_c_fields(out, reg, rec->fields[j].wit_type, rec->fields[j].snake, "    ");
+            fprintf(out, "} SapWit%s;\n\n", rec->camel);
             continue;
         }
-        const WitVariant *var = find_variant(reg, tname);
+        const WitVariant *var = order[idx].var;
         if (var) {
-            kebab_to_camel(tname, camel, MAX_NAME);
             fprintf(out, "typedef struct {\n");
             fprintf(out, "    uint8_t case_tag;\n");
             int has_payload = 0;
@@ -1176,13 +1299,12 @@ static void emit_header(FILE *out, const WitRegistry *reg,
                 fprintf(out, "    union {\n");
                 for (int j = 0; j < var->case_count; j++) {
                     if (var->cases[j].payload_type < 0) continue;
-                    char cname[MAX_NAME];
-                    kebab_to_snake(var->cases[j].name, cname, MAX_NAME);
-                    emit_variant_payload(out, reg, var->cases[j].payload_type, cname);
+                    emit_variant_payload(out, reg, var->cases[j].payload_type,
+                                         var->cases[j].snake);
                 }
                 fprintf(out, "    } val;\n");
             }
-            fprintf(out, "} SapWit%s;\n\n", camel);
+            fprintf(out, "} SapWit%s;\n\n", var->camel);
             continue;
         }
     }
@@ -1190,20 +1312,20 @@ static void emit_header(FILE *out, const WitRegistry *reg,
     /* --- Writer declarations --- */
     fprintf(out, "/* Writer functions */\n");
     for (int idx = 0; idx < norder; idx++) {
-        kebab_to_camel(order[idx], camel, MAX_NAME);
-        kebab_to_snake(order[idx], snake, MAX_NAME);
+        const char *tsnake = order[idx].rec ? order[idx].rec->snake : order[idx].var->snake;
+        const char *tcamel = order[idx].rec ? order[idx].rec->camel : order[idx].var->camel;
         fprintf(out, "int sap_wit_write_%s(ThatchRegion *region, const SapWit%s *val);\n",
-                snake, camel);
+                tsnake, tcamel);
     }
     fprintf(out, "\n");
 
     /* --- Reader declarations --- */
     fprintf(out, "/* Reader functions */\n");
     for (int idx = 0; idx < norder; idx++) {
-        kebab_to_camel(order[idx], camel, MAX_NAME);
-        kebab_to_snake(order[idx], snake, MAX_NAME);
+        const char *tsnake = order[idx].rec ? order[idx].rec->snake : order[idx].var->snake;
+        const char *tcamel = order[idx].rec ? order[idx].rec->camel : order[idx].var->camel;
         fprintf(out, "int sap_wit_read_%s(const ThatchRegion *region, ThatchCursor *cursor, SapWit%s *out);\n",
-                snake, camel);
+                tsnake, tcamel);
     }
     fprintf(out, "\n");
 
@@ -1214,8 +1336,8 @@ static void emit_header(FILE *out, const WitRegistry *reg,
     /* --- DBI blob validators (extern, full structural validation) --- */
     fprintf(out, "/* DBI blob validators */\n");
     for (int i = 0; i < ndbi; i++) {
-        kebab_to_snake(dbis[i].val_rec, snake, MAX_NAME);
-        fprintf(out, "int sap_wit_validate_%s(const void *data, uint32_t len);\n", snake);
+        fprintf(out, "int sap_wit_validate_%s(const void *data, uint32_t len);\n",
+                dbis[i].val->snake);
     }
     fprintf(out, "\n");
 
@@ -1265,23 +1387,11 @@ static void emit_write_type_expr(FILE *out, const WitRegistry *reg,
             return;
         }
         /* numeric primitives: tag + raw data */
-        const char *ctype = prim_c_type(t->ident);
-        if (ctype) {
-            const char *tag = NULL;
-            int size = 0;
-            if      (strcmp(t->ident, "s8")  == 0) { tag = "SAP_WIT_TAG_S8";  size = 1; }
-            else if (strcmp(t->ident, "u8")  == 0) { tag = "SAP_WIT_TAG_U8";  size = 1; }
-            else if (strcmp(t->ident, "s16") == 0) { tag = "SAP_WIT_TAG_S16"; size = 2; }
-            else if (strcmp(t->ident, "u16") == 0) { tag = "SAP_WIT_TAG_U16"; size = 2; }
-            else if (strcmp(t->ident, "s32") == 0) { tag = "SAP_WIT_TAG_S32"; size = 4; }
-            else if (strcmp(t->ident, "u32") == 0) { tag = "SAP_WIT_TAG_U32"; size = 4; }
-            else if (strcmp(t->ident, "s64") == 0) { tag = "SAP_WIT_TAG_S64"; size = 8; }
-            else if (strcmp(t->ident, "u64") == 0) { tag = "SAP_WIT_TAG_U64"; size = 8; }
-            else if (strcmp(t->ident, "f32") == 0) { tag = "SAP_WIT_TAG_F32"; size = 4; }
-            else if (strcmp(t->ident, "f64") == 0) { tag = "SAP_WIT_TAG_F64"; size = 8; }
-            if (tag) {
-                fprintf(out, "%sSAP_WIT_CHECK(thatch_write_tag(region, %s));\n", indent, tag);
-                fprintf(out, "%sSAP_WIT_CHECK(thatch_write_data(region, &%s, %d));\n", indent, access, size);
+        const WitPrim *prim = find_prim(t->ident);
+        if (prim && prim->ctype) {
+            if (prim->tag) {
+                fprintf(out, "%sSAP_WIT_CHECK(thatch_write_tag(region, %s));\n", indent, prim->tag);
+                fprintf(out, "%sSAP_WIT_CHECK(thatch_write_data(region, &%s, %d));\n", indent, access, prim->size);
             }
             return;
         }
@@ -1378,12 +1488,8 @@ static void emit_write_type_expr(FILE *out, const WitRegistry *reg,
 static void emit_write_record(FILE *out, const WitRegistry *reg,
                                const WitRecord *rec)
 {
-    char snake[MAX_NAME], camel[MAX_NAME];
-    kebab_to_snake(rec->name, snake, MAX_NAME);
-    kebab_to_camel(rec->name, camel, MAX_NAME);
-
     fprintf(out, "int sap_wit_write_%s(ThatchRegion *region, const SapWit%s *val)\n{\n",
-            snake, camel);
+            rec->snake, rec->camel);
 
     /* All records get skip pointers so sap_wit_skip_value works uniformly. */
     fprintf(out, "    SAP_WIT_CHECK(thatch_write_tag(region, SAP_WIT_TAG_RECORD));\n");
@@ -1391,8 +1497,8 @@ static void emit_write_record(FILE *out, const WitRegistry *reg,
     fprintf(out, "    SAP_WIT_CHECK(thatch_reserve_skip(region, &skip_loc));\n");
 
     for (int i = 0; i < rec->field_count; i++) {
-        char fname[MAX_NAME], access[256];
-        kebab_to_snake(rec->fields[i].name, fname, MAX_NAME);
+        const char *fname = rec->fields[i].snake;
+        char access[256];
 
         /* For option fields, the guard is has_X and we pass that as the condition */
         int res = resolve_type(reg, rec->fields[i].wit_type);
@@ -1423,13 +1529,8 @@ static void emit_write_record(FILE *out, const WitRegistry *reg,
 static void emit_write_variant(FILE *out, const WitRegistry *reg,
                                 const WitVariant *var)
 {
-    char snake[MAX_NAME], camel[MAX_NAME], upper_var[MAX_NAME];
-    kebab_to_snake(var->name, snake, MAX_NAME);
-    kebab_to_camel(var->name, camel, MAX_NAME);
-    kebab_to_upper(var->name, upper_var, MAX_NAME);
-
     fprintf(out, "int sap_wit_write_%s(ThatchRegion *region, const SapWit%s *val)\n{\n",
-            snake, camel);
+            var->snake, var->camel);
     fprintf(out, "    SAP_WIT_CHECK(thatch_write_tag(region, SAP_WIT_TAG_VARIANT));\n");
     fprintf(out, "    ThatchCursor skip_loc;\n");
     fprintf(out, "    SAP_WIT_CHECK(thatch_reserve_skip(region, &skip_loc));\n");
@@ -1437,14 +1538,12 @@ static void emit_write_variant(FILE *out, const WitRegistry *reg,
     fprintf(out, "    switch (val->case_tag) {\n");
 
     for (int j = 0; j < var->case_count; j++) {
-        char cu[MAX_NAME], cs[MAX_NAME];
-        kebab_to_upper(var->cases[j].name, cu, MAX_NAME);
-        kebab_to_snake(var->cases[j].name, cs, MAX_NAME);
-        fprintf(out, "    case SAP_WIT_%s_%s:\n", upper_var, cu);
-        if (var->cases[j].payload_type >= 0) {
+        const WitVariantCase *c = &var->cases[j];
+        fprintf(out, "    case SAP_WIT_%s_%s:\n", var->upper, c->upper);
+        if (c->payload_type >= 0) {
             char access[256];
-            snprintf(access, sizeof(access), "val->val.%s", cs);
-            emit_write_type_expr(out, reg, var->cases[j].payload_type, access, ".", "        ");
+            snprintf(access, sizeof(access), "val->val.%s", c->snake);
+            emit_write_type_expr(out, reg, c->payload_type, access, ".", "        ");
         }
         fprintf(out, "        break;\n");
     }
@@ -1494,24 +1593,12 @@ static void emit_read_type_expr(FILE *out, const WitRegistry *reg,
             return;
         }
         /* numeric primitives */
-        const char *ctype = prim_c_type(t->ident);
-        if (ctype) {
-            const char *tag = NULL;
-            int size = 0;
-            if      (strcmp(t->ident, "s8")  == 0) { tag = "SAP_WIT_TAG_S8";  size = 1; }
-            else if (strcmp(t->ident, "u8")  == 0) { tag = "SAP_WIT_TAG_U8";  size = 1; }
-            else if (strcmp(t->ident, "s16") == 0) { tag = "SAP_WIT_TAG_S16"; size = 2; }
-            else if (strcmp(t->ident, "u16") == 0) { tag = "SAP_WIT_TAG_U16"; size = 2; }
-            else if (strcmp(t->ident, "s32") == 0) { tag = "SAP_WIT_TAG_S32"; size = 4; }
-            else if (strcmp(t->ident, "u32") == 0) { tag = "SAP_WIT_TAG_U32"; size = 4; }
-            else if (strcmp(t->ident, "s64") == 0) { tag = "SAP_WIT_TAG_S64"; size = 8; }
-            else if (strcmp(t->ident, "u64") == 0) { tag = "SAP_WIT_TAG_U64"; size = 8; }
-            else if (strcmp(t->ident, "f32") == 0) { tag = "SAP_WIT_TAG_F32"; size = 4; }
-            else if (strcmp(t->ident, "f64") == 0) { tag = "SAP_WIT_TAG_F64"; size = 8; }
-            if (tag) {
+        const WitPrim *prim = find_prim(t->ident);
+        if (prim && prim->ctype) {
+            if (prim->tag) {
                 fprintf(out, "%s{ uint8_t tag; SAP_WIT_CHECK(thatch_read_tag(region, cursor, &tag));\n", indent);
-                fprintf(out, "%s  if (tag != %s) return ERR_TYPE; }\n", indent, tag);
-                fprintf(out, "%sSAP_WIT_CHECK(thatch_read_data(region, cursor, %d, &%s));\n", indent, size, access);
+                fprintf(out, "%s  if (tag != %s) return ERR_TYPE; }\n", indent, prim->tag);
+                fprintf(out, "%sSAP_WIT_CHECK(thatch_read_data(region, cursor, %d, &%s));\n", indent, prim->size, access);
             }
             return;
         }
@@ -1616,12 +1703,8 @@ static void emit_read_type_expr(FILE *out, const WitRegistry *reg,
 static void emit_read_record(FILE *out, const WitRegistry *reg,
                               const WitRecord *rec)
 {
-    char snake[MAX_NAME], camel[MAX_NAME];
-    kebab_to_snake(rec->name, snake, MAX_NAME);
-    kebab_to_camel(rec->name, camel, MAX_NAME);
-
     fprintf(out, "int sap_wit_read_%s(const ThatchRegion *region, ThatchCursor *cursor, SapWit%s *out)\n{\n",
-            snake, camel);
+            rec->snake, rec->camel);
 
     /* All records have skip pointers (uniform encoding).
      * Read skip_len and enforce segment-end: cursor must equal
@@ -1636,8 +1719,8 @@ static void emit_read_record(FILE *out, const WitRegistry *reg,
     fprintf(out, "    ThatchCursor _segment_end = *cursor + _skip_len;\n");
 
     for (int i = 0; i < rec->field_count; i++) {
-        char fname[MAX_NAME], access[256];
-        kebab_to_snake(rec->fields[i].name, fname, MAX_NAME);
+        const char *fname = rec->fields[i].snake;
+        char access[256];
 
         int res = resolve_type(reg, rec->fields[i].wit_type);
         WitTypeExpr *ft = (res >= 0) ? &g_type_pool[res] : NULL;
@@ -1666,13 +1749,8 @@ static void emit_read_record(FILE *out, const WitRegistry *reg,
 static void emit_read_variant(FILE *out, const WitRegistry *reg,
                                const WitVariant *var)
 {
-    char snake[MAX_NAME], camel[MAX_NAME], upper_var[MAX_NAME];
-    kebab_to_snake(var->name, snake, MAX_NAME);
-    kebab_to_camel(var->name, camel, MAX_NAME);
-    kebab_to_upper(var->name, upper_var, MAX_NAME);
-
     fprintf(out, "int sap_wit_read_%s(const ThatchRegion *region, ThatchCursor *cursor, SapWit%s *out)\n{\n",
-            snake, camel);
+            var->snake, var->camel);
     fprintf(out, "    { uint8_t tag; SAP_WIT_CHECK(thatch_read_tag(region, cursor, &tag));\n");
     fprintf(out, "      if (tag != SAP_WIT_TAG_VARIANT) return ERR_TYPE; }\n");
     fprintf(out, "    uint32_t _skip_len;\n");
@@ -1684,14 +1762,12 @@ static void emit_read_variant(FILE *out, const WitRegistry *reg,
     fprintf(out, "    switch (out->case_tag) {\n");
 
     for (int j = 0; j < var->case_count; j++) {
-        char cu[MAX_NAME], cs[MAX_NAME];
-        kebab_to_upper(var->cases[j].name, cu, MAX_NAME);
-        kebab_to_snake(var->cases[j].name, cs, MAX_NAME);
-        fprintf(out, "    case SAP_WIT_%s_%s:\n", upper_var, cu);
-        if (var->cases[j].payload_type >= 0) {
+        const WitVariantCase *c = &var->cases[j];
+        fprintf(out, "    case SAP_WIT_%s_%s:\n", var->upper, c->upper);
+        if (c->payload_type >= 0) {
             char access[256];
-            snprintf(access, sizeof(access), "out->val.%s", cs);
-            emit_read_type_expr(out, reg, var->cases[j].payload_type, access, ".", "        ");
+            snprintf(access, sizeof(access), "out->val.%s", c->snake);
+            emit_read_type_expr(out, reg, c->payload_type, access, ".", "        ");
         }
         fprintf(out, "        break;\n");
     }
@@ -1772,11 +1848,10 @@ static void emit_skip_function(FILE *out)
 /* ------------------------------------------------------------------ */
 
 static void emit_source(FILE *out, const WitRegistry *reg,
+                        const StructRef *order, int norder,
                         const DbiEntry *dbis, int ndbi,
                         const char *header_path)
 {
-    char snake[MAX_NAME];
-
     fprintf(out, "/* Auto-generated by tools/wit_codegen; DO NOT EDIT. */\n");
     fprintf(out, "#include \"%s\"\n", header_path);
     fprintf(out, "#include <string.h>\n\n");
@@ -1788,9 +1863,8 @@ static void emit_source(FILE *out, const WitRegistry *reg,
     if (ndbi > 0) {
         fprintf(out, "const SapWitDbiSchema sap_wit_dbi_schema[] = {\n");
         for (int i = 0; i < ndbi; i++) {
-            kebab_to_snake(dbis[i].name, snake, MAX_NAME);
             fprintf(out, "    {%du, \"%s\", \"%s\", \"%s\"},\n",
-                    dbis[i].dbi, snake, dbis[i].key_rec, dbis[i].val_rec);
+                    dbis[i].dbi, dbis[i].snake, dbis[i].key->name, dbis[i].val->name);
         }
         fprintf(out, "};\n\n");
         fprintf(out, "const uint32_t sap_wit_dbi_schema_count =\n");
@@ -1798,25 +1872,17 @@ static void emit_source(FILE *out, const WitRegistry *reg,
     }
 
     /* Writer functions in topological order */
-    const char *order[MAX_TYPES * 2];
-    int norder = topo_sort_types(reg, order, MAX_TYPES * 2);
-    if (norder < 0) return;
-
     fprintf(out, "/* ---- Writer functions ---- */\n\n");
     for (int idx = 0; idx < norder; idx++) {
-        const WitRecord *rec = find_record(reg, order[idx]);
-        if (rec) { emit_write_record(out, reg, rec); continue; }
-        const WitVariant *var = find_variant(reg, order[idx]);
-        if (var) { emit_write_variant(out, reg, var); continue; }
+        if (order[idx].rec) emit_write_record(out, reg, order[idx].rec);
+        else                emit_write_variant(out, reg, order[idx].var);
     }
 
     /* Reader functions in topological order */
     fprintf(out, "/* ---- Reader functions ---- */\n\n");
     for (int idx = 0; idx < norder; idx++) {
-        const WitRecord *rec = find_record(reg, order[idx]);
-        if (rec) { emit_read_record(out, reg, rec); continue; }
-        const WitVariant *var = find_variant(reg, order[idx]);
-        if (var) { emit_read_variant(out, reg, var); continue; }
+        if (order[idx].rec) emit_read_record(out, reg, order[idx].rec);
+        else                emit_read_variant(out, reg, order[idx].var);
     }
 
     /* Universal skip function */
@@ -1826,9 +1892,8 @@ static void emit_source(FILE *out, const WitRegistry *reg,
     /* DBI blob validators — full structural validation via typed readers */
     fprintf(out, "/* ---- DBI blob validators ---- */\n\n");
     for (int i = 0; i < ndbi; i++) {
-        char val_snake[MAX_NAME], val_camel[MAX_NAME];
-        kebab_to_snake(dbis[i].val_rec, val_snake, MAX_NAME);
-        kebab_to_camel(dbis[i].val_rec, val_camel, MAX_NAME);
+        const char *val_snake = dbis[i].val->snake;
+        const char *val_camel = dbis[i].val->camel;
         fprintf(out, "int sap_wit_validate_%s(const void *data, uint32_t len)\n{\n", val_snake);
         fprintf(out, "    if (!data && !len) return 0;\n");
         fprintf(out, "    if (!data || !len) return -1;\n");
@@ -1845,6 +1910,115 @@ static void emit_source(FILE *out, const WitRegistry *reg,
     }
 }
 
+/* ------------------------------------------------------------------ */
+/* Output files                                                       */
+/* ------------------------------------------------------------------ */
+
+/*
+ * Each output is rendered into a sibling "<path>.tmp" and renamed over the
+ * destination only when the bytes differ; otherwise the scratch file is
+ * removed.  Regenerating from an unchanged schema therefore leaves the
+ * generated files, and their mtimes, alone, so nothing that includes them
+ * is rebuilt, and a changed file is replaced in one step rather than
+ * rewritten in place.
+ *
+ * Generated files are a few tens of KiB; a buffer this size turns the many
+ * small fprintf() calls into a handful of write()s.  The data still goes
+ * to disk: read_stream()'s fseek() flushes the buffer to the scratch file
+ * before it is read back for the comparison.  Outputs are rendered one at a
+ * time, so they share the buffer and the scratch path.  codegen_die()
+ * exits mid-render, so the pending scratch file is also removed at exit.
+ */
+#define OUTPUT_BUFFER_SIZE (64 * 1024)
+#define OUTPUT_PATH_MAX    4096
+
+static char g_output_buf[OUTPUT_BUFFER_SIZE];
+static char g_output_tmp[OUTPUT_PATH_MAX]; /* "" when no scratch file exists */
+
+/* Read all of `f` from the start into a NUL-terminated malloc'd buffer. */
+static char *read_stream(FILE *f, size_t *len_out)
+{
+    if (fseek(f, 0, SEEK_END) != 0) return NULL;
+    long n = ftell(f);
+    if (n < 0 || fseek(f, 0, SEEK_SET) != 0) return NULL;
+    char *buf = malloc((size_t)n + 1);
+    if (!buf) return NULL;
+    if (fread(buf, 1, (size_t)n, f) != (size_t)n) {
+        free(buf);
+        return NULL;
+    }
+    buf[n] = '\0';
+    *len_out = (size_t)n;
+    return buf;
+}
+
+static void discard_pending_output(void)
+{
+    if (g_output_tmp[0]) {
+        remove(g_output_tmp);
+        g_output_tmp[0] = '\0';
+    }
+}
+
+static FILE *open_output(const char *path)
+{
+    static int cleanup_registered;
+    if (!cleanup_registered) {
+        atexit(discard_pending_output);
+        cleanup_registered = 1;
+    }
+    int n = snprintf(g_output_tmp, sizeof(g_output_tmp), "%s.tmp", path);
+    if (n < 0 || (size_t)n >= sizeof(g_output_tmp)) {
+        g_output_tmp[0] = '\0';
+        fprintf(stderr, "wit_codegen: output path too long: %s\n", path);
+        return NULL;
+    }
+    FILE *f = fopen(g_output_tmp, "w+b");
+    if (!f) {
+        fprintf(stderr, "wit_codegen: cannot create %s\n", g_output_tmp);
+        g_output_tmp[0] = '\0';
+        return NULL;
+    }
+    setvbuf(f, g_output_buf, _IOFBF, sizeof(g_output_buf));
+    return f;
+}
+
+static int output_matches(const char *path, const char *data, size_t len)
+{
+    FILE *f = fopen(path, "rb");
+    if (!f) return 0;
+    size_t cur_len = 0;
+    char *cur = read_stream(f, &cur_len);
+    fclose(f);
+    int same = cur && cur_len == len && memcmp(cur, data, len) == 0;
+    free(cur);
+    return same;
+}
+
+/* Publish the rendered output to `path` unless it already holds it. */
+static int close_output(FILE *f, const char *path)
+{
+    size_t len = 0;
+    char *data = NULL;
+    int ok = !ferror(f);
+    if (ok) {
+        data = read_stream(f, &len);
+        ok = data != NULL;
+    }
+    if (fclose(f) != 0) ok = 0;
+    if (ok && !output_matches(path, data, len)) {
+        ok = rename(g_output_tmp, path) == 0;
+        if (ok) g_output_tmp[0] = '\0';
+    }
+    free(data);
+    discard_pending_output();
+    if (!ok) {
+        fprintf(stderr, "wit_codegen: failed to write %s\n", path);
+        return 0;
+    }
+    return 1;
+}
+
 /* ------------------------------------------------------------------ */
 /* Main                                                               */
 /* ------------------------------------------------------------------ */
@@ -1878,19 +2052,19 @@ int main(int argc, char **argv)
         fprintf(stderr, "wit_codegen: cannot open %s\n", wit_path);
         return 1;
     }
-    fseek(f, 0, SEEK_END);
-    long fsize = ftell(f);
-    fseek(f, 0, SEEK_SET);
-    char *src = malloc(fsize + 1);
-    if (!src) { fclose(f); return 1; }
-    fread(src, 1, fsize, f);
-    src[fsize] = '\0';
+    size_t fsize = 0;
+    char *src = read_stream(f, &fsize);
     fclose(f);
+    if (!src) {
+        fprintf(stderr, "wit_codegen: cannot read %s\n", wit_path);
+        return 1;
+    }
 
     Scanner scanner;
     scanner_init(&scanner, src, (int)fsize);
 
-    WitRegistry reg;
+    /* Several hundred KiB of fixed-capacity tables: keep it off the stack. */
+    static WitRegistry reg;
     if (!parse_wit(&scanner, &reg)) {
         fprintf(stderr, "wit_codegen: parse failed at line %d col %d\n",
                 scanner.line, scanner.col);
@@ -1906,24 +2080,23 @@ int main(int argc, char **argv)
         return 1;
     }
 
+    /* Both outputs walk the same struct order; sort once. */
+    StructRef order[MAX_TYPES * 2];
+    int norder = topo_sort_types(&reg, order, MAX_TYPES * 2);
+    if (norder < 0) { free(src); return 1; }
+
     if (header_path) {
-        FILE *hdr = fopen(header_path, "w");
-        if (!hdr) {
-            fprintf(stderr, "wit_codegen: cannot create %s\n", header_path);
-            free(src); return 1;
-        }
-        emit_header(hdr, &reg, dbis, ndbi, header_path);
-        fclose(hdr);
+        FILE *hdr = open_output(header_path);
+        if (!hdr) { free(src); return 1; }
+        emit_header(hdr, &reg, order, norder, dbis, ndbi, header_path);
+        if (!close_output(hdr, header_path)) { free(src); return 1; }
     }
 
     if (source_path && header_path) {
-        FILE *csrc = fopen(source_path, "w");
-        if (!csrc) {
-            fprintf(stderr, "wit_codegen: cannot create %s\n", source_path);
-            free(src); return 1;
-        }
-        emit_source(csrc, &reg, dbis, ndbi, header_path);
-        fclose(csrc);
+        FILE *csrc = open_output(source_path);
+        if (!csrc) { free(src); return 1; }
+        emit_source(csrc, &reg, order, norder, dbis, ndbi, header_path);
+        if (!close_output(csrc, source_path)) { free(src); return 1; }
     }
 
     printf("wit_codegen: PASS (records=%d variants=%d enums=%d flags=%d "
@@ -19,22 +19,47 @@
 #include <string.h>
 #include <sys/stat.h>
 
+/* File contents plus a NUL terminator; the allocation is reused across reads. */
+typedef struct
+{
+    char *data;
+    size_t len;
+    size_t cap;
+} FileBuf;
+
+/* name/status point into Manifest.text, which is tokenized in place. */
 typedef struct
 {
     int dbi;
-    char *name;
-    char *status;
+    const char *name;
+    const char *status;
     int line_no;
 } ManifestEntry;
 
 typedef struct
 {
+    FileBuf text;
     ManifestEntry *items;
     size_t len;
     size_t cap;
     int max_dbi;
+    /* One bit per dbi below seen_bits (>= the row count); see manifest_push(). */
+    unsigned char *seen;
+    size_t seen_bits;
 } Manifest;
 
+/* Manifest CSV columns, in header order. */
+enum
+{
+    MANIFEST_COL_DBI,
+    MANIFEST_COL_NAME,
+    MANIFEST_COL_KEY_FORMAT,
+    MANIFEST_COL_VALUE_FORMAT,
+    MANIFEST_COL_OWNER,
+    MANIFEST_COL_STATUS,
+    MANIFEST_COL_COUNT
+};
+
 typedef struct
 {
     char *name; /* SAP_WIT_DBI_* */
@@ -114,18 +139,6 @@ static int starts_with(const char *s, const char *prefix)
     return (strncmp(s, prefix, np) == 0);
 }
 
-static char *trim_ws(char *s)
-{
-    char *end;
-    while (*s && isspace((unsigned char)*s))
-        s++;
-    end = s + strlen(s);
-    while (end > s && isspace((unsigned char)end[-1]))
-        end--;
-    *end = '\0';
-    return s;
-}
-
 static int is_word_char(int c)
 {
     return (isalnum((unsigned char)c) || c == '_');
@@ -148,15 +161,12 @@ static int str_ieq(const char *a, const char *b)
     return (*a == '\0' && *b == '\0');
 }
 
-static int int_cmp(const void *ap, const void *bp)
+static void filebuf_free(FileBuf *fb)
 {
-    const int a = *(const int *)ap;
-    const int b = *(const int *)bp;
-    if (a < b)
-        return -1;
-    if (a > b)
-        return 1;
-    return 0;
+    if (!fb)
+        return;
+    free(fb->data);
+    memset(fb, 0, sizeof(*fb));
 }
 
 static void manifest_init(Manifest *m)
@@ -167,15 +177,11 @@ static void manifest_init(Manifest *m)
 
 static void manifest_free(Manifest *m)
 {
-    size_t i;
     if (!m)
         return;
-    for (i = 0; i < m->len; i++)
-    {
-        free(m->items[i].name);
-        free(m->items[i].status);
-    }
+    filebuf_free(&m->text);
     free(m->items);
+    free(m->seen);
     memset(m, 0, sizeof(*m));
     m->max_dbi = -1;
 }
@@ -183,12 +189,24 @@ static void manifest_free(Manifest *m)
 static int manifest_push(Manifest *m, int dbi, const char *name, const char *status,
                          int line_no, const char *prefix)
 {
-    size_t i;
     ManifestEntry *next;
-    for (i = 0; i < m->len; i++)
+    if ((size_t)dbi < m->seen_bits)
     {
-        if (m->items[i].dbi == dbi)
+        unsigned char bit = (unsigned char)(1u << ((unsigned)dbi & 7u));
+        if (m->seen[(unsigned)dbi >> 3] & bit)
             return failf(prefix, "line %d: duplicate dbi %d", line_no, dbi);
+        m->seen[(unsigned)dbi >> 3] |= bit;
+    }
+    else
+    {
+        /* Beyond the row count this can only be a gap, so it is rare enough
+         * to check the slow way. */
+        size_t i;
+        for (i = 0; i < m->len; i++)
+        {
+            if (m->items[i].dbi == dbi)
+                return failf(prefix, "line %d: duplicate dbi %d", line_no, dbi);
+        }
     }
 
     if (m->len == m->cap)
@@ -202,26 +220,22 @@ static int manifest_push(Manifest *m, int dbi, const char *name, const char *sta
     }
 
     m->items[m->len].dbi = dbi;
-    m->items[m->len].name = xstrdup(name);
-    m->items[m->len].status = xstrdup(status);
+    m->items[m->len].name = name;
+    m->items[m->len].status = status;
     m->items[m->len].line_no = line_no;
-    if (!m->items[m->len].name || !m->items[m->len].status)
-        return failf(prefix, "out of memory");
     m->len++;
     if (dbi > m->max_dbi)
         m->max_dbi = dbi;
     return 0;
 }
 
+/* Valid only after load_manifest_strict(), which stores each entry at
+ * items[dbi]. */
 static const ManifestEntry *manifest_find(const Manifest *m, int dbi)
 {
-    size_t i;
-    for (i = 0; i < m->len; i++)
-    {
-        if (m->items[i].dbi == dbi)
-            return &m->items[i];
-    }
-    return NULL;
+    if (dbi < 0 || (size_t)dbi >= m->len)
+        return NULL;
+    return &m->items[dbi];
 }
 
 static void macros_init(MacroTable *m) { memset(m, 0, sizeof(*m)); }
@@ -319,15 +333,20 @@ static int intlist_add_unique(IntList *list, int v, const char *prefix)
     return 0;
 }
 
-static int read_entire_file(const char *path, char **buf_out, size_t *len_out, const char *prefix)
+/* Read `path` into `fb`, growing its buffer only when the file is larger than
+ * any read so far, so scanning a directory costs one allocation, not one per
+ * file.
+ *
+ * mmap() would also work here (<sys/mman.h> builds fine alongside the
+ * <dirent.h> use above), but the inputs are small source and doc files and
+ * plain stdio keeps the tool free of one more POSIX-only dependency. */
+static int read_file_into(const char *path, FileBuf *fb, const char *prefix)
 {
     FILE *f = NULL;
     long sz = 0;
     size_t got = 0;
-    char *buf = NULL;
 
-    *buf_out = NULL;
-    *len_out = 0u;
+    fb->len = 0u;
 
     f = fopen(path, "rb");
     if (!f)
@@ -349,80 +368,110 @@ static int read_entire_file(const char *path, char **buf_out, size_t *len_out, c
         return failf(prefix, "failed to rewind %s", path);
     }
 
-    buf = (char *)malloc((size_t)sz + 1u);
-    if (!buf)
+    if ((size_t)sz + 1u > fb->cap)
     {
-        fclose(f);
-        return failf(prefix, "out of memory");
+        char *next = (char *)realloc(fb->data, (size_t)sz + 1u);
+        if (!next)
+        {
+            fclose(f);
+            return failf(prefix, "out of memory");
+        }
+        fb->data = next;
+        fb->cap = (size_t)sz + 1u;
     }
     if (sz > 0)
     {
-        got = fread(buf, 1u, (size_t)sz, f);
+        got = fread(fb->data, 1u, (size_t)sz, f);
         if (got != (size_t)sz)
         {
-            free(buf);
             fclose(f);
             return failf(prefix, "failed to read %s", path);
         }
     }
-    buf[(size_t)sz] = '\0';
+    fb->data[(size_t)sz] = '\0';
+    fb->len = (size_t)sz;
     fclose(f);
-    *buf_out = buf;
-    *len_out = (size_t)sz;
     return 0;
 }
 
+/* Split `line` on ',' in place.  Each field is whitespace-trimmed while its
+ * bounds are known, so cells need no separate strlen/trim pass; clean cells
+ * cost one isspace() test at each end. */
 static int parse_csv_fields(char *line, char **fields, size_t expected)
 {
-    size_t n = 1u;
-    char *p;
-    fields[0] = line;
-    for (p = line; *p; p++)
+    size_t n = 0u;
+    char *p = line;
+    for (;;)
     {
-        if (*p == ',')
-        {
-            *p = '\0';
-            if (n >= expected)
-                return -1;
-            fields[n++] = p + 1;
-        }
+        char *start;
+        char *end;
+        int last;
+
+        while (isspace((unsigned char)*p))
+            p++;
+        start = p;
+        while (*p && *p != ',')
+            p++;
+        end = p;
+        while (end > start && isspace((unsigned char)end[-1]))
+            end--;
+        if (n >= expected)
+            return -1;
+        fields[n++] = start;
+        last = (*p == '\0');
+        *end = '\0';
+        if (last)
+            break;
+        p++;
     }
     return (n == expected) ? 0 : -1;
 }
 
 static int load_manifest_strict(const char *manifest_path, Manifest *out, const char *prefix)
 {
-    FILE *f = NULL;
-    char line[4096];
+    char *line;
+    char *next;
+    char *text_end;
     int line_no = 0;
     static const char *k_header = "dbi,name,key_format,value_format,owner,status";
 
     manifest_init(out);
 
-    f = fopen(manifest_path, "rb");
-    if (!f)
+    if (!path_exists(manifest_path))
         return failf(prefix, "file not found: %s", manifest_path);
+    if (read_file_into(manifest_path, &out->text, prefix) != 0)
+    {
+        manifest_free(out);
+        return 1;
+    }
 
-    while (fgets(line, (int)sizeof(line), f))
+    /* Rows are split and trimmed in place; entries keep pointers into the text. */
+    text_end = out->text.data + out->text.len;
+
+    /* The line count bounds the number of rows, and so the dbi range a
+     * gap-free manifest can use. */
+    out->seen_bits = 1u;
+    for (line = out->text.data; (line = (char *)memchr(line, '\n', (size_t)(text_end - line))) != NULL;
+         line++)
+        out->seen_bits++;
+    out->seen = (unsigned char *)calloc((out->seen_bits + 7u) / 8u, 1u);
+    if (!out->seen)
     {
-        char *nl;
-        char *row[6];
-        char *dbi_field;
-        char *name_field;
-        char *status_field;
+        manifest_free(out);
+        return failf(prefix, "out of memory");
+    }
+
+    for (line = out->text.data; line < text_end; line = next)
+    {
+        char *nl = (char *)memchr(line, '\n', (size_t)(text_end - line));
+        char *row[MANIFEST_COL_COUNT];
         char *end = NULL;
         long dbi_val;
         int i;
 
         line_no++;
 
-        if (!strchr(line, '\n') && !feof(f))
-        {
-            fclose(f);
-            manifest_free(out);
-            return failf(prefix, "line %d too long", line_no);
-        }
-        nl = strchr(line, '\n');
+        next = nl ? nl + 1 : text_end;
         if (nl)
             *nl = '\0';
         nl = strchr(line, '\r');
@@ -433,58 +482,51 @@ static int load_manifest_strict(const char *manifest_path, Manifest *out, const
         {
             if (strcmp(line, k_header) != 0)
             {
-                fclose(f);
+                /* report before manifest_free(): `line` lives in the text buffer */
+                int rc = failf(prefix, "expected header %s, got %s", k_header, line);
                 manifest_free(out);
-                return failf(prefix, "expected header %s, got %s", k_header, line);
+                return rc;
             }
             continue;
         }
 
-        if (parse_csv_fields(line, row, 6u) != 0)
+        if (parse_csv_fields(line, row, MANIFEST_COL_COUNT) != 0)
         {
-            fclose(f);
             manifest_free(out);
             return failf(prefix, "line %d: expected 6 CSV columns", line_no);
         }
 
-        for (i = 0; i < 6; i++)
+        for (i = 0; i < MANIFEST_COL_COUNT; i++)
         {
-            row[i] = trim_ws(row[i]);
             if (row[i][0] == '\0')
             {
-                fclose(f);
                 manifest_free(out);
                 return failf(prefix, "line %d: empty column", line_no);
             }
         }
 
-        dbi_field = row[0];
-        name_field = row[1];
-        status_field = row[5];
-
         errno = 0;
-        dbi_val = strtol(dbi_field, &end, 10);
+        dbi_val = strtol(row[MANIFEST_COL_DBI], &end, 10);
         if (errno != 0 || !end || *end != '\0')
         {
-            fclose(f);
+            int rc = failf(prefix, "line %d: dbi is not an integer: %s", line_no,
+                           row[MANIFEST_COL_DBI]);
             manifest_free(out);
-            return failf(prefix, "line %d: dbi is not an integer: %s", line_no, dbi_field);
+            return rc;
         }
         if (dbi_val < 0 || dbi_val > INT_MAX)
         {
-            fclose(f);
             manifest_free(out);
             return failf(prefix, "line %d: dbi must be >= 0", line_no);
         }
 
-        if (manifest_push(out, (int)dbi_val, name_field, status_field, line_no, prefix) != 0)
+        if (manifest_push(out, (int)dbi_val, row[MANIFEST_COL_NAME], row[MANIFEST_COL_STATUS],
+                          line_no, prefix) != 0)
         {
-            fclose(f);
             manifest_free(out);
             return 1;
         }
     }
-    fclose(f);
 
     if (out->len == 0u)
     {
@@ -492,63 +534,89 @@ static int load_manifest_strict(const char *manifest_path, Manifest *out, const
         return failf(prefix, "manifest has no entries");
     }
 
+    /* With no duplicates, len entries are gap-free from 0 exactly when
+     * dbis 0..len-1 are all present. */
     {
         size_t i;
-        int *sorted = (int *)malloc(out->len * sizeof(*sorted));
-        if (!sorted)
+        int missing = -1;
+        for (i = 0; i < out->len; i++)
         {
-            manifest_free(out);
-            return failf(prefix, "out of memory");
+            if (!(out->seen[i >> 3] & (1u << (i & 7u))))
+            {
+                missing = (int)i;
+                break;
+            }
         }
-        for (i = 0; i < out->len; i++)
-            sorted[i] = out->items[i].dbi;
-        qsort(sorted, out->len, sizeof(*sorted), int_cmp);
-        if (sorted[0] != 0)
+        if (missing == 0)
         {
-            free(sorted);
             manifest_free(out);
             return failf(prefix, "dbi 0 entry is required");
         }
-        for (i = 1; i < out->len; i++)
+        if (missing > 0)
         {
-            if (sorted[i] != sorted[i - 1] + 1)
+            int prev = missing - 1;
+            int cur = INT_MAX;
+            for (i = 0; i < out->len; i++)
             {
-                int prev = sorted[i - 1];
-                int cur = sorted[i];
-                free(sorted);
-                manifest_free(out);
-                return failf(prefix, "dbi sequence has a gap between %d and %d", prev, cur);
+                if (out->items[i].dbi > prev && out->items[i].dbi < cur)
+                    cur = out->items[i].dbi;
+            }
+            manifest_free(out);
+            return failf(prefix, "dbi sequence has a gap between %d and %d", prev, cur);
+        }
+        out->max_dbi = (int)out->len - 1;
+
+        /* dbis are now a permutation of 0..len-1: cycle each entry into
+         * items[dbi] so manifest_find() is a direct index. */
+        for (i = 0; i < out->len; i++)
+        {
+            while ((size_t)out->items[i].dbi != i)
+            {
+                size_t j = (size_t)out->items[i].dbi;
+                ManifestEntry tmp = out->items[j];
+                out->items[j] = out->items[i];
+                out->items[i] = tmp;
             }
         }
-        out->max_dbi = sorted[out->len - 1u];
-        free(sorted);
     }
     return 0;
 }
 
 static int load_wit_macros(const char *wit_header, MacroTable *macros, const char *prefix)
 {
-    FILE *f = NULL;
-    char line[4096];
+    FileBuf fb = {0};
+    char *line;
+    char *next;
+    char *buf_end;
     int line_no = 0;
 
     macros_init(macros);
-    f = fopen(wit_header, "rb");
-    if (!f)
-        return failf(prefix, "path not found: %s", wit_header);
+    if (read_file_into(wit_header, &fb, prefix) != 0)
+    {
+        filebuf_free(&fb);
+        return 1;
+    }
 
-    while (fgets(line, (int)sizeof(line), f))
+    /* Walk the header in place: one read, no per-line copies. */
+    buf_end = fb.data + fb.len;
+    for (line = fb.data; line < buf_end; line = next)
     {
         char macro[256];
-        char value[64];
         size_t mi = 0u;
-        size_t vi = 0u;
         char *p = line;
-        char *end = NULL;
+        char *nl = (char *)memchr(line, '\n', (size_t)(buf_end - line));
+        const char *value;
+        size_t value_len;
+        size_t digits;
+        size_t k;
         long dbi_val;
-        size_t n;
+        int d;
         line_no++;
 
+        next = nl ? nl + 1 : buf_end;
+        if (nl)
+            *nl = '\0';
+
         while (*p && isspace((unsigned char)*p))
             p++;
         if (strncmp(p, "#define", 7) != 0 || !isspace((unsigned char)p[7]))
@@ -563,7 +631,7 @@ static int load_wit_macros(const char *wit_header, MacroTable *macros, const cha
         {
             if (mi + 1u >= sizeof(macro))
             {
-                fclose(f);
+                filebuf_free(&fb);
                 macros_free(macros);
                 return failf(prefix, "%s:%d macro token too long", wit_header, line_no);
             }
@@ -572,67 +640,65 @@ static int load_wit_macros(const char *wit_header, MacroTable *macros, const cha
         macro[mi] = '\0';
         if (mi == 0u)
         {
-            fclose(f);
+            filebuf_free(&fb);
             macros_free(macros);
             return failf(prefix, "%s:%d malformed macro line", wit_header, line_no);
         }
 
         while (*p && isspace((unsigned char)*p))
             p++;
+        value = p;
         while (*p && !isspace((unsigned char)*p))
+            p++;
+        value_len = (size_t)(p - value);
+        if (value_len == 0u)
         {
-            if (vi + 1u >= sizeof(value))
-            {
-                fclose(f);
-                macros_free(macros);
-                return failf(prefix, "%s:%d macro value token too long", wit_header, line_no);
-            }
-            value[vi++] = *p++;
-        }
-        value[vi] = '\0';
-        if (vi == 0u)
-        {
-            fclose(f);
+            filebuf_free(&fb);
             macros_free(macros);
             return failf(prefix, "%s:%d missing macro value", wit_header, line_no);
         }
 
-        n = strlen(value);
-        if (n > 0u && (value[n - 1u] == 'u' || value[n - 1u] == 'U'))
-            value[n - 1u] = '\0';
-        if (value[0] == '\0')
+        /* Decimal digits with an optional u/U suffix, validated and
+         * accumulated in a single pass. */
+        digits = value_len;
+        if (value[digits - 1u] == 'u' || value[digits - 1u] == 'U')
+            digits--;
+        if (digits == 0u)
         {
-            fclose(f);
+            filebuf_free(&fb);
             macros_free(macros);
             return failf(prefix, "%s:%d invalid macro value", wit_header, line_no);
         }
-        for (n = 0u; value[n]; n++)
+        dbi_val = 0;
+        for (k = 0u; k < digits; k++)
         {
-            if (!isdigit((unsigned char)value[n]))
+            if (!isdigit((unsigned char)value[k]))
+            {
+                filebuf_free(&fb);
+                macros_free(macros);
+                return failf(prefix, "%s:%d non-numeric macro value %.*s", wit_header, line_no,
+                             (int)digits, value);
+            }
+            d = value[k] - '0';
+            /* Check before accumulating: long may be only 32 bits. */
+            if (dbi_val > (INT_MAX - d) / 10)
             {
-                fclose(f);
+                filebuf_free(&fb);
                 macros_free(macros);
-                return failf(prefix, "%s:%d non-numeric macro value %s", wit_header, line_no,
-                             value);
+                return failf(prefix, "%s:%d invalid macro value %.*s", wit_header, line_no,
+                             (int)digits, value);
             }
+            dbi_val = dbi_val * 10 + d;
         }
 
-        errno = 0;
-        dbi_val = strtol(value, &end, 10);
-        if (errno != 0 || !end || *end != '\0' || dbi_val < 0 || dbi_val > INT_MAX)
-        {
-            fclose(f);
-            macros_free(macros);
-            return failf(prefix, "%s:%d invalid macro value %s", wit_header, line_no, value);
-        }
         if (macros_push(macros, macro, (int)dbi_val, prefix) != 0)
         {
-            fclose(f);
+            filebuf_free(&fb);
             macros_free(macros);
             return 1;
         }
     }
-    fclose(f);
+    filebuf_free(&fb);
 
     if (macros->len == 0u)
     {
@@ -647,6 +713,7 @@ static int collect_runtime_dbi_usage(const char *runner_dir, const MacroTable *m
 {
     DIR *dir = NULL;
     struct dirent *ent = NULL;
+    FileBuf fb = {0};
     int rc = 0;
 
     intlist_init(runtime_used);
@@ -657,8 +724,8 @@ static int collect_runtime_dbi_usage(const char *runner_dir, const MacroTable *m
     while ((ent = readdir(dir)) != NULL)
     {
         char *path = NULL;
-        char *buf = NULL;
-        size_t len = 0u;
+        const char *buf;
+        size_t len;
         size_t i;
 
         if (ent->d_name[0] == '.')
@@ -672,19 +739,25 @@ static int collect_runtime_dbi_usage(const char *runner_dir, const MacroTable *m
             rc = failf(prefix, "out of memory");
             break;
         }
-        if (read_entire_file(path, &buf, &len, prefix) != 0)
+        if (read_file_into(path, &fb, prefix) != 0)
         {
             free(path);
             rc = 1;
             break;
         }
         free(path);
+        buf = fb.data;
+        len = fb.len;
 
         for (i = 0u; i + 12u <= len; i++)
         {
             size_t j;
             char token[256];
             int dbi;
+            const char *hit = (const char *)memchr(buf + i, 'S', len - 11u - i);
+            if (!hit)
+                break;
+            i = (size_t)(hit - buf);
             if (memcmp(buf + i, "SAP_WIT_DBI_", 12u) != 0)
                 continue;
             if (i > 0u && is_word_char((unsigned char)buf[i - 1u]))
@@ -708,12 +781,12 @@ static int collect_runtime_dbi_usage(const char *runner_dir, const MacroTable *m
             }
             i = j;
         }
-        free(buf);
         if (rc != 0)
             break;
     }
 
     closedir(dir);
+    filebuf_free(&fb);
     if (rc != 0)
     {
         intlist_free(runtime_used);
@@ -727,6 +800,7 @@ static int collect_runner_doc_dbi_usage(const char *docs_dir, IntList *doc_used,
 {
     DIR *dir = NULL;
     struct dirent *ent = NULL;
+    FileBuf fb = {0};
     int rc = 0;
 
     intlist_init(doc_used);
@@ -737,8 +811,8 @@ static int collect_runner_doc_dbi_usage(const char *docs_dir, IntList *doc_used,
     while ((ent = readdir(dir)) != NULL)
     {
         char *path = NULL;
-        char *buf = NULL;
-        size_t len = 0u;
+        const char *buf;
+        size_t len;
         size_t i;
 
         if (ent->d_name[0] == '.')
@@ -752,20 +826,26 @@ static int collect_runner_doc_dbi_usage(const char *docs_dir, IntList *doc_used,
             rc = failf(prefix, "out of memory");
             break;
         }
-        if (read_entire_file(path, &buf, &len, prefix) != 0)
+        if (read_file_into(path, &fb, prefix) != 0)
         {
             free(path);
             rc = 1;
             break;
         }
         free(path);
+        buf = fb.data;
+        len = fb.len;
 
         for (i = 0u; i + 3u <= len; i++)
         {
             size_t j;
             size_t k;
             long v;
-            if (buf[i] != 'D' || buf[i + 1u] != 'B' || buf[i + 2u] != 'I')
+            const char *hit = (const char *)memchr(buf + i, 'D', len - 2u - i);
+            if (!hit)
+                break;
+            i = (size_t)(hit - buf);
+            if (buf[i + 1u] != 'B' || buf[i + 2u] != 'I')
                 continue;
             if (i > 0u && is_word_char((unsigned char)buf[i - 1u]))
                 continue;
@@ -798,12 +878,12 @@ static int collect_runner_doc_dbi_usage(const char *docs_dir, IntList *doc_used,
             i = k;
         }
 
-        free(buf);
         if (rc != 0)
             break;
     }
 
     closedir(dir);
+    filebuf_free(&fb);
     if (rc != 0)
     {
         intlist_free(doc_used);
@@ -833,7 +913,8 @@ static int run_runner_status_check(const char *manifest_path, const char *wit_he
     MacroTable macros;
     IntList runtime_used;
     IntList doc_used;
-    IntList required_active;
+    unsigned char *required_active = NULL;
+    size_t required_active_count = 0u;
     char *runner_dir = NULL;
     char *docs_dir = NULL;
     size_t i;
@@ -843,7 +924,6 @@ static int run_runner_status_check(const char *manifest_path, const char *wit_he
     macros_init(&macros);
     intlist_init(&runtime_used);
     intlist_init(&doc_used);
-    intlist_init(&required_active);
 
     runner_dir = path_join2(repo_root, "src/runner");
     docs_dir = path_join2(repo_root, "docs");
@@ -883,25 +963,24 @@ static int run_runner_status_check(const char *manifest_path, const char *wit_he
     if (collect_runner_doc_dbi_usage(docs_dir, &doc_used, "runner-dbi-status") != 0)
         goto out;
 
-    for (i = 0u; i < runtime_used.len; i++)
+    /* Every runtime/doc reference must name an active manifest row.  The
+     * union is never materialised: rows are flagged by dbi as they are
+     * checked, and the flags give the required_active count. */
+    required_active = (unsigned char *)calloc(manifest.len, 1u);
+    if (!required_active)
     {
-        if (intlist_add_unique(&required_active, runtime_used.vals[i], "runner-dbi-status") != 0)
-            goto out;
-    }
-    for (i = 0u; i < doc_used.len; i++)
-    {
-        if (intlist_add_unique(&required_active, doc_used.vals[i], "runner-dbi-status") != 0)
-            goto out;
+        failf("runner-dbi-status", "out of memory");
+        goto out;
     }
-
-    for (i = 0u; i < required_active.len; i++)
+    for (i = 0u; i < runtime_used.len + doc_used.len; i++)
     {
-        const ManifestEntry *row = manifest_find(&manifest, required_active.vals[i]);
+        int dbi = (i < runtime_used.len) ? runtime_used.vals[i]
+                                         : doc_used.vals[i - runtime_used.len];
+        const ManifestEntry *row = manifest_find(&manifest, dbi);
         if (!row)
         {
             failf("runner-dbi-status",
-                  "DBI %d is referenced by runner code/docs but missing in manifest",
-                  required_active.vals[i]);
+                  "DBI %d is referenced by runner code/docs but missing in manifest", dbi);
             goto out;
         }
         if (!str_ieq(row->status, "active"))
@@ -909,9 +988,14 @@ static int run_runner_status_check(const char *manifest_path, const char *wit_he
             failf("runner-dbi-status",
                   "DBI %d (%s) is referenced by runner code/docs but has status='%s'; expected "
                   "'active'",
-                  required_active.vals[i], row->name, row->status);
+                  dbi, row->name, row->status);
             goto out;
         }
+        if (!required_active[dbi])
+        {
+            required_active[dbi] = 1u;
+            required_active_count++;
+        }
     }
 
     for (i = 0u; i < macros.len; i++)
@@ -952,7 +1036,7 @@ static int run_runner_status_check(const char *manifest_path, const char *wit_he
     }
 
     printf("runner-dbi-status: PASS (runtime_dbis=%zu doc_dbis=%zu required_active=%zu)\n",
-           runtime_used.len, doc_used.len, required_active.len);
+           runtime_used.len, doc_used.len, required_active_count);
     rc = 0;
 
 out:
@@ -962,7 +1046,7 @@ out:
     macros_free(&macros);
     intlist_free(&runtime_used);
     intlist_free(&doc_used);
-    intlist_free(&required_active);
+    free(required_active);
     return rc;
 }
 